@@ -1,11 +1,13 @@
-from dataclasses import dataclass
+import operator
+import sys
 from datetime import date
-from typing import Optional
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
-# 1. The Dataclass - Bio-metrics and Running only
+# 1. The Metrics Record - Bio-metrics and Running only
+# A NamedTuple: rows are read-only once built, have no per-instance __dict__,
+# and the displayed fields come first in SCHEMA order so a row is a plain tuple slice.
 # Note: We still include fields that garmin_client.py passes, but set them to None
-@dataclass
-class GarminMetrics:
+class GarminMetrics(NamedTuple):
     date: date
     sleep_score: Optional[float] = None
     sleep_length: Optional[float] = None
@@ -38,39 +40,42 @@ class GarminMetrics:
     tennis_activity_count: Optional[int] = None
     tennis_activity_duration: Optional[float] = None
 
-# 2. Headers for your "Garmin_Data" Sheet - Only what you want to see
-HEADERS = [
-    "Day/Date", "Sleep Score", "Sleep Length", "HRV (ms)", "HRV Status", 
-    "Resting Heart Rate", "Average Stress", "Active Calories", "Resting Calories", 
-    "Training Status", "VO2 Max Running", "Intensity Minutes", 
-    "All Activity Count", "Running Activity Count", "Running Distance (km)", 
-    "Strength Activity Count", "Strength Duration", "Cardio Activity Count", 
-    "Cardio Duration", "Steps"
-]
+# 2. Sheet Schema for your "Garmin_Data" Sheet - Only what you want to see
+# Each entry is (column header, GarminMetrics attribute), in column order.
+SCHEMA = (
+    ("Day/Date", "date"),
+    ("Sleep Score", "sleep_score"),
+    ("Sleep Length", "sleep_length"),
+    ("HRV (ms)", "overnight_hrv"),
+    ("HRV Status", "hrv_status"),
+    ("Resting Heart Rate", "resting_heart_rate"),
+    ("Average Stress", "average_stress"),
+    ("Active Calories", "active_calories"),
+    ("Resting Calories", "resting_calories"),
+    ("Training Status", "training_status"),
+    ("VO2 Max Running", "vo2max_running"),
+    ("Intensity Minutes", "intensity_minutes"),
+    ("All Activity Count", "all_activity_count"),
+    ("Running Activity Count", "running_activity_count"),
+    ("Running Distance (km)", "running_distance"),
+    ("Strength Activity Count", "strength_activity_count"),
+    ("Strength Duration", "strength_duration"),
+    ("Cardio Activity Count", "cardio_activity_count"),
+    ("Cardio Duration", "cardio_duration"),
+    ("Steps", "steps"),
+)
 
-# 3. Attribute Mapping - Only the metrics you want displayed
-HEADER_TO_ATTRIBUTE_MAP = {
-    "Day/Date": "date",
-    "Sleep Score": "sleep_score",
-    "Sleep Length": "sleep_length",
-    "HRV (ms)": "overnight_hrv",
-    "HRV Status": "hrv_status",
-    "Resting Heart Rate": "resting_heart_rate",
-    "Average Stress": "average_stress",
-    "Active Calories": "active_calories",
-    "Resting Calories": "resting_calories",
-    "Training Status": "training_status",
-    "VO2 Max Running": "vo2max_running",
-    "Intensity Minutes": "intensity_minutes",
-    "All Activity Count": "all_activity_count",
-    "Running Activity Count": "running_activity_count",
-    "Running Distance (km)": "running_distance",
-    "Strength Activity Count": "strength_activity_count",
-    "Strength Duration": "strength_duration",
-    "Cardio Activity Count": "cardio_activity_count",
-    "Cardio Duration": "cardio_duration",
-    "Steps": "steps"
-}
+# 3. Derived lookups - edit SCHEMA above rather than these
+HEADERS: List[str] = [header for header, _ in SCHEMA]
+# Attribute names in HEADERS order, so row assembly needs no per-row dict lookups
+HEADER_ATTRS: Tuple[str, ...] = tuple(sys.intern(attribute) for _, attribute in SCHEMA)
+HEADER_TO_ATTRIBUTE_MAP: Dict[str, str] = dict(zip(HEADERS, HEADER_ATTRS))
+
+assert GarminMetrics._fields[:len(HEADER_ATTRS)] == HEADER_ATTRS, \
+    "GarminMetrics must declare the SCHEMA attributes first, in SCHEMA order"
+
+# A row's displayed values in HEADERS order, as one tuple slice instead of per-attribute lookups
+metric_row = operator.itemgetter(slice(0, len(HEADER_ATTRS)))
 
 # 4. Sheet Settings
 SHEET_DATE_FORMAT = "%A %B %-d,%Y" 
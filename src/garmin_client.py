@@ -1,22 +1,65 @@
 from datetime import date
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
 import asyncio
 import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import garminconnect
 from garth.sso import resume_login
 import garth
 from .exceptions import MFARequiredException
 from .config import GarminMetrics
+from .request_stats import RequestStats
 
 logger = logging.getLogger(__name__)
 
+# Retry settings for transient Garmin API failures (HTTP 429 and 5xx)
+MAX_API_ATTEMPTS = 4
+RETRY_BASE_DELAY = 1.0  # seconds; doubled on each retry, plus jitter
+
+# Blocking Garmin API calls in flight at once, whatever the number of days or profiles being fetched.
+# Garmin's API is unofficial and rate-limits hard, so this stays in the 4-8 per-host range.
+MAX_CONCURRENT_API_CALLS = 8
+
+# Shared by every client in the process, so syncing several profiles at once doesn't multiply the load on Garmin
+_API_CALL_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_API_CALLS)
+
+def _run_limited(stats: RequestStats, queued_at: float, func: Callable[..., Any], *args: Any) -> Any:
+    """Runs func on the calling worker thread once a process-wide API call slot is free.
+
+    Only the call itself is timed; the time spent queueing for a worker and a slot is recorded as a wait.
+    """
+    with _API_CALL_SLOTS:
+        stats.record_wait(time.perf_counter() - queued_at)
+        with stats.track():
+            return func(*args)
+
+def _is_transient_error(error: Exception) -> bool:
+    """Returns True for rate limiting and server-side errors that are worth retrying."""
+    if isinstance(error, garminconnect.GarminConnectTooManyRequestsError):
+        return True
+    error_msg = str(error)
+    return "429" in error_msg or "Too Many Requests" in error_msg or "Server Error" in error_msg
+
 class GarminClient:
-    def __init__(self, email: str, password: str):
+    def __init__(self, email: str, password: str, max_concurrent_calls: int = MAX_CONCURRENT_API_CALLS):
         self.client = garminconnect.Garmin(email, password)
+        # garminconnect is blocking, so API calls run on this pool. Its size caps the requests in flight;
+        # calls from the concurrently fetched days queue here rather than all hitting Garmin at once.
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_calls, thread_name_prefix="garmin-api"
+        )
+        self.stats = RequestStats("Garmin")
         self._authenticated = False
         self.mfa_ticket_dict = None
         self._auth_failed = False  # Track if authentication failed to prevent loops
 
+    def close(self):
+        """Shuts down the API thread pool. Calls still running finish in the background."""
+        self._executor.shutdown(wait=False)
+
     async def authenticate(self):
         """Modified to handle non-async login method"""
         # Store the garth client instance before attempting login, in case MFA is required
@@ -64,21 +107,66 @@ class GarminClient:
             logger.error(f"An unexpected error occurred during authentication: {str(e)}")
             raise garminconnect.GarminConnectAuthenticationError(f"An unexpected error occurred during authentication: {str(e)}") from e # Re-raise as GarminConnectAuthenticationError
 
+    async def _call_api(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Runs a blocking garminconnect call in the executor, retrying rate limits and server errors with backoff."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(1, MAX_API_ATTEMPTS + 1):
+            try:
+                return await loop.run_in_executor(
+                    self._executor, _run_limited, self.stats, time.perf_counter(), func, *args
+                )
+            except Exception as e:
+                if attempt == MAX_API_ATTEMPTS or not _is_transient_error(e):
+                    raise
+                self.stats.record_retry()
+                delay = RETRY_BASE_DELAY * 2 ** (attempt - 1) + random.uniform(0, RETRY_BASE_DELAY)
+                logger.warning(f"Transient Garmin API error in {func.__name__}: {e}. Retrying in {delay:.1f}s (attempt {attempt}/{MAX_API_ATTEMPTS})")
+                await asyncio.sleep(delay)
+
     async def _fetch_hrv_data(self, target_date_iso: str) -> Optional[Dict[str, Any]]:
         """Fetches HRV data for the given date."""
         # logger.info(f"Attempting to fetch HRV data for {target_date_iso}")
         try:
-            hrv_data = await asyncio.get_event_loop().run_in_executor(
-                None, self.client.get_hrv_data, target_date_iso
+            hrv_data = await self._call_api(
+                self.client.get_hrv_data, target_date_iso
             )
-            logger.debug(f"Raw HRV data for {target_date_iso}: {hrv_data}")
+            logger.debug("Raw HRV data for %s: %s", target_date_iso, hrv_data)
             return hrv_data
         except Exception as e:
             logger.error(f"Error fetching HRV data for {target_date_iso}: {str(e)}")
             return None
 
-    async def get_metrics(self, target_date: date) -> GarminMetrics:
-        logger.debug(f"VERIFY get_metrics: display_name: {getattr(self.client, 'display_name', 'Not Set')}, oauth2_token type: {type(self.client.garth.oauth2_token)}")
+    async def get_activities_range(self, start_date: date, end_date: date) -> Optional[Dict[date, List[Dict[str, Any]]]]:
+        """Fetches every activity in the range with one search and buckets them by local start date.
+
+        Returns None if the request fails, so callers can fall back to per-day activity fetches.
+        """
+        try:
+            activities = await self._call_api(
+                self.client.get_activities_by_date,
+                start_date.isoformat(), end_date.isoformat()
+            )
+        except Exception as e:
+            logger.error(f"Error fetching activities from {start_date} to {end_date}: {str(e)}")
+            return None
+
+        activities_by_day: Dict[date, List[Dict[str, Any]]] = {}
+        for activity in activities or ():
+            start_time = activity.get('startTimeLocal')
+            if not start_time:
+                continue
+            try:
+                activity_date = date.fromisoformat(start_time[:10])
+            except ValueError:
+                logger.warning("Skipping activity %s with unparseable start time %r", activity.get('activityId'), start_time)
+                continue
+            activities_by_day.setdefault(activity_date, []).append(activity)
+        return activities_by_day
+
+    async def get_metrics(self, target_date: date, prefetched_activities: Optional[List[Dict[str, Any]]] = None) -> GarminMetrics:
+        """Fetches all metrics for target_date. Pass prefetched_activities from get_activities_range to skip the per-day activity search."""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("VERIFY get_metrics: display_name: %s, oauth2_token type: %s", getattr(self.client, 'display_name', 'Not Set'), type(self.client.garth.oauth2_token))
         if not self._authenticated:
             if self._auth_failed:
                 raise Exception("Authentication has already failed. Cannot fetch metrics without successful authentication.")
@@ -86,46 +174,48 @@ class GarminClient:
 
         try:
             async def get_stats():
-                return await asyncio.get_event_loop().run_in_executor(
-                    None, self.client.get_stats_and_body, target_date.isoformat()
+                return await self._call_api(
+                    self.client.get_stats_and_body, target_date.isoformat()
                 )
 
             async def get_sleep():
-                return await asyncio.get_event_loop().run_in_executor(
-                    None, self.client.get_sleep_data, target_date.isoformat()
+                return await self._call_api(
+                    self.client.get_sleep_data, target_date.isoformat()
                 )
 
             async def get_activities():
-                return await asyncio.get_event_loop().run_in_executor(
-                    None, self.client.get_activities_by_date, 
+                if prefetched_activities is not None:
+                    return prefetched_activities
+                return await self._call_api(
+                    self.client.get_activities_by_date, 
                     target_date.isoformat(), target_date.isoformat()
                 )
 
             async def get_user_summary():
-                return await asyncio.get_event_loop().run_in_executor(
-                    None, self.client.get_user_summary, target_date.isoformat()
+                return await self._call_api(
+                    self.client.get_user_summary, target_date.isoformat()
                 )
 
             async def get_training_status():
-                return await asyncio.get_event_loop().run_in_executor(
-                    None, self.client.get_training_status, target_date.isoformat()
+                return await self._call_api(
+                    self.client.get_training_status, target_date.isoformat()
                 )
             
             async def get_hrv():
                 return await self._fetch_hrv_data(target_date.isoformat())
 
-            # Fetch data concurrently
+            # Fetch data concurrently (the activity search is skipped when activities were prefetched)
             stats, sleep_data, activities, summary, training_status, hrv_payload = await asyncio.gather(
                 get_stats(), get_sleep(), get_activities(), get_user_summary(), get_training_status(), get_hrv()
             )
 
-            # Debug logging
-            logger.debug(f"Raw stats data: {stats}")
-            logger.debug(f"Raw sleep data: {sleep_data}")
-            logger.debug(f"Raw activities data: {activities}")
-            logger.debug(f"Raw summary data: {summary}")
-            logger.debug(f"Raw training status data: {training_status}")
-            logger.debug(f"Raw HRV payload: {hrv_payload}")
+            # Debug logging - deferred formatting so the raw payloads are only stringified when DEBUG is on
+            logger.debug("Raw stats data: %s", stats)
+            logger.debug("Raw sleep data: %s", sleep_data)
+            logger.debug("Raw activities data: %s", activities)
+            logger.debug("Raw summary data: %s", summary)
+            logger.debug("Raw training status data: %s", training_status)
+            logger.debug("Raw HRV payload: %s", hrv_payload)
 
             # Process HRV data
             overnight_hrv_value: Optional[int] = None
@@ -182,7 +272,7 @@ class GarminClient:
             else:
                 logger.warning(f"Activities data for {target_date} is None. Activity metrics will be blank.")
 
-            # Initialize metrics to None, as per GarminMetrics dataclass defaults
+            # Initialize metrics to None, as per GarminMetrics field defaults
             sleep_score: Optional[float] = None
             sleep_length: Optional[float] = None
             weight: Optional[float] = None
@@ -1,183 +1,334 @@
 import typer
 import sys
+import functools
+import atexit
+import io
+import locale
+import contextvars
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta, date
 import asyncio
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Awaitable, Dict, List, Optional, Tuple
 import os
-import csv
 from pathlib import Path
-from dotenv import load_dotenv, find_dotenv
 import logging
-import re
-import garth
 
-from src.garmin_client import GarminClient
-from src.sheets_client import GoogleSheetsClient, GoogleAuthTokenRefreshError
 from src.exceptions import MFARequiredException
-from src.config import HEADERS, HEADER_TO_ATTRIBUTE_MAP, GarminMetrics
+from src.config import HEADERS, GarminMetrics, metric_row
+
+# Client modules (and garth) are imported where they're used, so startup and CSV runs don't load the Google stack
+if TYPE_CHECKING:
+    import garth
+    from src.garmin_client import GarminClient
+    from src.sheets_client import GoogleSheetsClient
 
 # Suppress noisy library warnings to clean up output
 logging.getLogger('google_auth_oauthlib.flow').setLevel(logging.WARNING)
 logging.getLogger("hpack").setLevel(logging.WARNING)
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Name of the profile the current task is syncing; set per task when several profiles run at once
+_current_profile: contextvars.ContextVar[str] = contextvars.ContextVar("profile", default="")
+
+class _ProfileLogFilter(logging.Filter):
+    """Adds the current profile as a log prefix so interleaved multi-profile output stays readable."""
+    def filter(self, record: logging.LogRecord) -> bool:
+        profile = _current_profile.get()
+        record.profile = f"[{profile}] " if profile else ""
+        return True
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(profile)s%(message)s')
+for _handler in logging.getLogger().handlers:
+    _handler.addFilter(_ProfileLogFilter())
 logger = logging.getLogger(__name__)
 
 app = typer.Typer()
 
+# Maximum number of days fetched from Garmin at the same time
+MAX_CONCURRENT_FETCHES = 8
+
+# Rows sent to Google Sheets per update while the remaining days are still being fetched
+SHEETS_WRITE_BATCH_SIZE = 50
+
+# Cached Garmin sessions are re-authenticated once their token is this close to expiry (seconds)
+SESSION_EXPIRY_MARGIN = 60
+
+# Set once .env has been loaded so re-invocations from this process don't reload it
+ENV_LOADED_SENTINEL = "GARMINGO_ENV_LOADED"
+
+def _date_range(start_date: date, end_date: date) -> List[date]:
+    """Returns every date from start_date to end_date inclusive."""
+    return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+# Open CSV outputs keyed by resolved path, kept open across sync() calls and closed at exit.
+# Each entry is (O_APPEND file descriptor, in-memory buffer, csv writer bound to that buffer).
+_CSV_WRITERS: Dict[Path, Tuple[int, io.StringIO, Any]] = {}
+
+def _close_csv_writers():
+    """Closes every cached CSV file descriptor."""
+    for fd, _, _ in _CSV_WRITERS.values():
+        os.close(fd)
+    _CSV_WRITERS.clear()
+
+atexit.register(_close_csv_writers)
+
+def _write_csv(metrics_to_write: List[GarminMetrics], csv_path: Path):
+    """Appends metrics to csv_path, reusing the open file and writer from earlier calls."""
+    key = csv_path.resolve()
+    cached = _CSV_WRITERS.get(key)
+    if cached is None:
+        import csv
+        csv_path.parent.mkdir(parents=True, exist_ok=True)
+        # O_APPEND positions every write at the current end of file, even if another process appended since.
+        # O_BINARY (Windows only) stops the C runtime from turning the csv module's \r\n into \r\r\n.
+        fd = os.open(csv_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        buffer = io.StringIO(newline='')
+        writer = csv.writer(buffer)
+        if os.fstat(fd).st_size == 0: # File is new/empty
+            writer.writerow(HEADERS)
+        cached = _CSV_WRITERS[key] = (fd, buffer, writer)
+
+    fd, buffer, writer = cached
+    # Rows are formatted in memory and appended with a single write, so an interrupted sync doesn't
+    # leave a partial run behind; csv writes None as an empty field
+    writer.writerows(map(metric_row, metrics_to_write))
+    data = memoryview(buffer.getvalue().encode(locale.getpreferredencoding(False)))
+    buffer.seek(0)
+    buffer.truncate()
+    while data:
+        # Regular files take the whole buffer at once; the loop only covers short writes (e.g. a full disk)
+        data = data[os.write(fd, data):]
+
+# Authenticated garth clients keyed by profile name, reused by later sync() calls in this process
+_SESSION_CACHE: Dict[str, "garth.Client"] = {}
+
+def _session_is_fresh(garth_client: "garth.Client") -> bool:
+    """True while the client's OAuth2 token is valid for at least SESSION_EXPIRY_MARGIN more seconds."""
+    oauth2_token = getattr(garth_client, "oauth2_token", None)
+    expires_at = getattr(oauth2_token, "expires_at", None)
+    return expires_at is not None and time.time() < expires_at - SESSION_EXPIRY_MARGIN
+
+# Garmin user profiles keyed by profile name, so re-authenticating doesn't refetch /userprofile
+_PROFILE_CACHE: Dict[str, dict] = {}
+
+def _bind_client(garmin_client: "GarminClient", garth_client: "garth.Client", profile_name: str):
+    """Attaches an authenticated garth client to garmin_client and loads the user's profile."""
+    garmin_client.client.garth = garth_client
+    profile = _PROFILE_CACHE.get(profile_name)
+    if profile is None:
+        profile = _PROFILE_CACHE[profile_name] = garth_client.profile
+    garmin_client.client.display_name = profile.get("displayName")
+    garmin_client.client.full_name = profile.get("fullName")
+    garmin_client.client.unit_system = profile.get("measurementSystem")
+    logger.info(f"✓ Profile loaded: {garmin_client.client.display_name}")
+    garmin_client._authenticated = True
+
+async def _indexed(index: int, fetch: Awaitable[GarminMetrics]) -> Tuple[int, GarminMetrics]:
+    """Awaits a fetch and tags the result with its position in the date range."""
+    return index, await fetch
+
+async def _stream_to_sheets(sheets_client: "GoogleSheetsClient", fetches: List[Awaitable[GarminMetrics]]):
+    """Writes days to Google Sheets in date order, in batches, while later days are still being fetched."""
+    loop = asyncio.get_running_loop()
+    # The Sheets client is blocking, so its calls run off-loop. Reading the sheet layout
+    # starts right away and overlaps with the Garmin fetches instead of waiting for the first batch.
+    # Executor threads don't inherit context variables, so each call runs in a copy of this task's
+    # context to keep the profile log prefix
+    prepared = loop.run_in_executor(None, contextvars.copy_context().run, sheets_client.prepare)
+    tasks = [asyncio.ensure_future(_indexed(i, fetch)) for i, fetch in enumerate(fetches)]
+
+    async def write(batch: List[GarminMetrics]):
+        # Awaiting the finished future again is free, so prepare() itself only ever runs once
+        if not await prepared:
+            raise RuntimeError(f"Could not read the layout of sheet '{sheets_client.sheet_name}'; nothing was written.")
+        await loop.run_in_executor(None, contextvars.copy_context().run, sheets_client.update_metrics, batch)
+
+    ready = {}
+    next_index = 0
+    batch = []
+    try:
+        for completed in asyncio.as_completed(tasks):
+            index, metric = await completed
+            ready[index] = metric
+            # Only release days once every earlier day has arrived, so rows stay in date order
+            while next_index in ready:
+                batch.append(ready.pop(next_index))
+                next_index += 1
+            while len(batch) >= SHEETS_WRITE_BATCH_SIZE:
+                # Remaining fetches keep running while this batch is written
+                await write(batch[:SHEETS_WRITE_BATCH_SIZE])
+                batch = batch[SHEETS_WRITE_BATCH_SIZE:]
+        if batch:
+            await write(batch)
+    finally:
+        for task in tasks:
+            task.cancel()
+        if not prepared.done():
+            prepared.cancel()
+
 async def sync(email: str, password: str, start_date: date, end_date: date, output_type: str, profile_data: dict, profile_name: str = ""):
     """Core sync logic. Fetches data and writes to the specified output."""
-    
+    from src.garmin_client import GarminClient
+
+    garmin_client = GarminClient(email, password)
+    try:
+        await _authenticate_off_loop(garmin_client, email, password, profile_name)
+        await _fetch_and_write(garmin_client, start_date, end_date, output_type, profile_data, profile_name)
+    finally:
+        _release_client(garmin_client)
+
+def _release_client(garmin_client: "GarminClient"):
+    """Logs the client's request stats and releases its API worker threads."""
+    garmin_client.stats.log_summary()
+    garmin_client.close()
+
+def _authenticate(garmin_client: "GarminClient", email: str, password: str, profile_name: str):
+    """Binds a Garmin session to garmin_client: cached, resumed from saved tokens, or a fresh login.
+
+    Blocking (network calls and a possible MFA prompt), so async callers run it through _authenticate_off_loop.
+    """
     # Setup garth token directory for this profile
     token_dir = Path(f"./credentials/garmin_tokens_{profile_name}")
     token_dir.mkdir(parents=True, exist_ok=True)
     
-    # Configure garth's home directory for storing tokens
-    os.environ["GARTH_HOME"] = str(token_dir)
+    garth_client = _SESSION_CACHE.get(profile_name)
     
-    garmin_client = None
-    
-    # Try to resume from saved tokens first
-    try:
-        logger.info(f"Attempting to resume Garmin session from saved tokens in {token_dir}")
-        garth.resume(str(token_dir))
-        logger.info("Successfully resumed Garmin session from saved tokens!")
-        
-        # Create client with the resumed session
-        garmin_client = GarminClient(email, password)
-        garmin_client.client.garth = garth.client
-        
-        # Make sure profile is loaded
-        if not garmin_client.client.display_name:
-            profile = garth.client.profile
-            garmin_client.client.display_name = profile.get("displayName")
-            garmin_client.client.full_name = profile.get("fullName")
-            garmin_client.client.unit_system = profile.get("measurementSystem")
-            logger.info(f"Profile loaded: {garmin_client.client.display_name}")
-        
-        garmin_client._authenticated = True
-        
-    except Exception as resume_error:
-        logger.info(f"Could not resume from saved tokens: {resume_error}")
-        logger.info("Proceeding with fresh authentication using garth directly...")
+    if garth_client is not None and _session_is_fresh(garth_client):
+        # Reuse the session authenticated earlier in this process
+        logger.info(f"Reusing cached Garmin session for profile '{profile_name}'")
+        _bind_client(garmin_client, garth_client, profile_name)
+    else:
+        # Each profile gets its own garth client so sessions never leak between profiles
+        garth_client = garmin_client.client.garth
         
+        # Try to resume from saved tokens first
         try:
-            # Use garth directly for authentication
-            logger.info("Step 1: Authenticating with Garth...")
+            logger.info(f"Attempting to resume Garmin session from saved tokens in {token_dir}")
+            garth_client.load(str(token_dir))
+            logger.info("Successfully resumed Garmin session from saved tokens!")
+            _bind_client(garmin_client, garth_client, profile_name)
+            
+        except Exception as resume_error:
+            logger.info(f"Could not resume from saved tokens: {resume_error}")
+            logger.info("Proceeding with fresh authentication using garth directly...")
             
             try:
-                # Try to login with garth
-                garth.login(email, password)
-                logger.info("✓ Garth authentication successful!")
-                
-                # Save the tokens
-                garth.save(str(token_dir))
-                logger.info(f"✓ Tokens saved to {token_dir}")
-                
-                # Create Garmin client and assign the authenticated garth client
-                garmin_client = GarminClient(email, password)
-                garmin_client.client.garth = garth.client
-                
-                # Load profile information
-                profile = garth.client.profile
-                garmin_client.client.display_name = profile.get("displayName")
-                garmin_client.client.full_name = profile.get("fullName")
-                garmin_client.client.unit_system = profile.get("measurementSystem")
-                logger.info(f"✓ Profile loaded: {garmin_client.client.display_name}")
-                
-                garmin_client._authenticated = True
-                
-            except Exception as garth_error:
-                error_str = str(garth_error)
-                logger.error(f"Garth login error: {error_str}")
+                # Use garth directly for authentication
+                logger.info("Step 1: Authenticating with Garth...")
                 
-                # Check if MFA is required
-                if "MFA" in error_str or "verification" in error_str.lower():
-                    logger.info("MFA/verification required")
+                try:
+                    # Try to login with garth
+                    garth_client.login(email, password)
+                    logger.info("✓ Garth authentication successful!")
                     
-                    if not sys.stdin.isatty():
-                        logger.error("MFA required but running in non-interactive environment.")
-                        print("\n❌ MFA code is required but cannot prompt in non-interactive mode")
-                        print("Please run this script locally first to authenticate with MFA")
-                        sys.exit(1)
+                    # Save the tokens
+                    garth_client.dump(str(token_dir))
+                    logger.info(f"✓ Tokens saved to {token_dir}")
                     
-                    # Prompt for MFA code
-                    mfa_code = input("\nEnter MFA code: ").strip()
+                    _bind_client(garmin_client, garth_client, profile_name)
                     
-                    try:
-                        # Resume login with MFA code
-                        from garth.sso import resume_login
-                        oauth1, oauth2 = resume_login(garth.client, mfa_code)
-                        
-                        # Update garth client with tokens
-                        garth.client.oauth1_token = oauth1
-                        garth.client.oauth2_token = oauth2
-                        
-                        # Save tokens
-                        garth.save(str(token_dir))
-                        logger.info("✓ MFA successful and tokens saved!")
+                except Exception as garth_error:
+                    error_str = str(garth_error)
+                    logger.error(f"Garth login error: {error_str}")
+                    
+                    # Check if MFA is required
+                    if "MFA" in error_str or "verification" in error_str.lower():
+                        logger.info("MFA/verification required")
                         
-                        # Create Garmin client
-                        garmin_client = GarminClient(email, password)
-                        garmin_client.client.garth = garth.client
+                        if not sys.stdin.isatty():
+                            logger.error("MFA required but running in non-interactive environment.")
+                            print("\n❌ MFA code is required but cannot prompt in non-interactive mode")
+                            print("Please run this script locally first to authenticate with MFA")
+                            sys.exit(1)
                         
-                        # Load profile information
-                        profile = garth.client.profile
-                        garmin_client.client.display_name = profile.get("displayName")
-                        garmin_client.client.full_name = profile.get("fullName")
-                        garmin_client.client.unit_system = profile.get("measurementSystem")
-                        logger.info(f"✓ Profile loaded: {garmin_client.client.display_name}")
+                        # Prompt for MFA code
+                        mfa_code = input("\nEnter MFA code: ").strip()
                         
-                        garmin_client._authenticated = True
+                        try:
+                            # Resume login with MFA code
+                            from garth.sso import resume_login
+                            oauth1, oauth2 = resume_login(garth_client, mfa_code)
+                            
+                            # Update garth client with tokens
+                            garth_client.oauth1_token = oauth1
+                            garth_client.oauth2_token = oauth2
+                            
+                            # Save tokens
+                            garth_client.dump(str(token_dir))
+                            logger.info("✓ MFA successful and tokens saved!")
+                            
+                            _bind_client(garmin_client, garth_client, profile_name)
+                            
+                        except Exception as mfa_error:
+                            logger.error(f"MFA submission failed: {mfa_error}")
+                            print(f"\n❌ MFA failed: {mfa_error}")
+                            sys.exit(1)
+                    else:
+                        # Not an MFA error, re-raise
+                        raise
                         
-                    except Exception as mfa_error:
-                        logger.error(f"MFA submission failed: {mfa_error}")
-                        print(f"\n❌ MFA failed: {mfa_error}")
-                        sys.exit(1)
-                else:
-                    # Not an MFA error, re-raise
-                    raise
-                    
-        except Exception as e:
-            logger.error(f"Authentication failed: {type(e).__name__}: {str(e)}", exc_info=True)
-            print(f"\n❌ Authentication failed: {str(e)}")
-            print("\nTroubleshooting steps:")
-            print("1. Verify credentials at https://connect.garmin.com")
-            print("2. If you have MFA enabled, you'll need to enter the code")
-            print("3. Wait 10-15 minutes if you've tried multiple times (rate limiting)")
-            print("4. Try disabling MFA temporarily on Garmin to test")
-            sys.exit(1)
+            except Exception as e:
+                logger.error(f"Authentication failed: {type(e).__name__}: {str(e)}", exc_info=True)
+                print(f"\n❌ Authentication failed: {str(e)}")
+                print("\nTroubleshooting steps:")
+                print("1. Verify credentials at https://connect.garmin.com")
+                print("2. If you have MFA enabled, you'll need to enter the code")
+                print("3. Wait 10-15 minutes if you've tried multiple times (rate limiting)")
+                print("4. Try disabling MFA temporarily on Garmin to test")
+                sys.exit(1)
+        
+        _SESSION_CACHE[profile_name] = garth_client
     
     if not garmin_client or not garmin_client._authenticated:
         logger.error("Failed to create authenticated Garmin client")
         sys.exit(1)
 
+async def _authenticate_off_loop(garmin_client: "GarminClient", email: str, password: str, profile_name: str):
+    """Runs _authenticate on a worker thread so other profiles' tasks keep running meanwhile."""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(
+        None, contextvars.copy_context().run, _authenticate, garmin_client, email, password, profile_name
+    )
+
+async def _fetch_and_write(garmin_client: "GarminClient", start_date: date, end_date: date, output_type: str,
+                           profile_data: dict, profile_name: str):
+    """Fetches the date range with an authenticated client and writes it to the chosen output."""
     logger.info(f"Fetching metrics from {start_date.isoformat()} to {end_date.isoformat()}...")
-    metrics_to_write = []
-    current_date = start_date
-    while current_date <= end_date:
-        logger.info(f"Fetching metrics for {current_date.isoformat()}")
-        daily_metrics = await garmin_client.get_metrics(current_date)
-        metrics_to_write.append(daily_metrics)
-        current_date += timedelta(days=1)
-
-    if not metrics_to_write:
+    dates = _date_range(start_date, end_date)
+    
+    # Fetch days concurrently, capped so we don't trip Garmin's rate limiting
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+
+    if not dates:
         logger.warning("No metrics fetched. Nothing to write.")
         return
 
+    # One activity search covers the whole range; if it fails, each day searches its own activities.
+    # It runs as a task so the Sheets layout read started by _stream_to_sheets overlaps with it.
+    activities_search = asyncio.ensure_future(garmin_client.get_activities_range(start_date, end_date))
+
+    async def fetch_day(current_date: date) -> GarminMetrics:
+        activities_by_day = await activities_search
+        async with semaphore:
+            logger.info("Fetching metrics for %s", current_date)
+            day_activities = activities_by_day.get(current_date, []) if activities_by_day is not None else None
+            return await garmin_client.get_metrics(current_date, prefetched_activities=day_activities)
+
     if output_type == 'sheets':
         sheets_id = profile_data.get('sheet_id')
         sheet_name = profile_data.get('sheet_name', 'Raw Data')
         display_name = profile_data.get('spreadsheet_name', f"ID: {sheets_id}")
 
         logger.info(f"Initializing Google Sheets client for spreadsheet: '{display_name}'")
+        from src.sheets_client import GoogleSheetsClient, GoogleAuthTokenRefreshError
+        sheets_client = None
         try:
             sheets_client = GoogleSheetsClient(
                 credentials_path='credentials/client_secret.json',
                 spreadsheet_id=sheets_id,
                 sheet_name=sheet_name
             )
-            sheets_client.update_metrics(metrics_to_write)
+            await _stream_to_sheets(sheets_client, [fetch_day(d) for d in dates])
             logger.info("Google Sheets sync completed successfully!")
         
         except GoogleAuthTokenRefreshError as auth_error:
@@ -212,8 +363,16 @@ async def sync(email: str, password: str, start_date: date, end_date: date, outp
             logger.error(f"An error occurred during Google Sheets operation: {str(sheet_error)}", exc_info=True)
             print(f"\nAn error occurred while updating Google Sheets: {sheet_error}")
             sys.exit(1)
+        finally:
+            # Only still running if the Sheets client couldn't be created
+            activities_search.cancel()
+            # Logged on failures and exits too, where the request counts matter most
+            if sheets_client is not None:
+                sheets_client.stats.log_summary()
 
     elif output_type == 'csv':
+        metrics_to_write = await asyncio.gather(*(fetch_day(d) for d in dates))
+
         # Use configured CSV path or default to output directory with profile name
         if 'csv_path' in profile_data and profile_data['csv_path']:
             csv_path = Path(profile_data['csv_path'])
@@ -223,48 +382,123 @@ async def sync(email: str, password: str, start_date: date, end_date: date, outp
             csv_path = output_dir / f"garmingo_{profile_name if profile_name else 'output'}.csv"
         
         logger.info(f"Writing metrics to CSV file: {csv_path}")
-        csv_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(csv_path, 'a', newline='') as f:
-            writer = csv.writer(f)
-            if f.tell() == 0: # Write header if file is new/empty
-                writer.writerow(HEADERS)
-            for metric in metrics_to_write:
-                writer.writerow([getattr(metric, HEADER_TO_ATTRIBUTE_MAP.get(h, ""), "") for h in HEADERS])
+        _write_csv(metrics_to_write, csv_path)
         logger.info("CSV file sync completed successfully!")
 
+# Maps the .env variable suffix to the profile dict key
+_KEY_MAP = {
+    "GARMIN_EMAIL": "email",
+    "GARMIN_PASSWORD": "password",
+    "SHEET_ID": "sheet_id",
+    "SHEET_NAME": "sheet_name",
+    "SPREADSHEET_NAME": "spreadsheet_name",
+    "CSV_PATH": "csv_path"
+}
+
 def load_user_profiles():
     """Parses .env for user profiles, now including SPREADSHEET_NAME."""
-    profiles = {}
-    profile_pattern = re.compile(r"^(USER\d+)_(GARMIN_EMAIL|GARMIN_PASSWORD|SHEET_ID|SHEET_NAME|SPREADSHEET_NAME|CSV_PATH)$")
+    profiles = defaultdict(dict)
 
+    # Keys look like USER<N>_<SUFFIX>; a partition and set lookup is enough to recognise them
     for key, value in os.environ.items():
-        match = profile_pattern.match(key)
-        if match:
-            profile_name, var_type = match.groups()
-            if profile_name not in profiles:
-                profiles[profile_name] = {}
-            
-            key_map = {
-                "GARMIN_EMAIL": "email",
-                "GARMIN_PASSWORD": "password",
-                "SHEET_ID": "sheet_id",
-                "SHEET_NAME": "sheet_name",
-                "SPREADSHEET_NAME": "spreadsheet_name",
-                "CSV_PATH": "csv_path"
-            }
-            profiles[profile_name][key_map[var_type]] = value
-    return profiles
+        profile_name, _, var_type = key.partition("_")
+        if profile_name.startswith("USER") and profile_name[4:].isdecimal() and var_type in _KEY_MAP:
+            profiles[profile_name][_KEY_MAP[var_type]] = value
+    return dict(profiles)
+
+async def _run_as_profile(profile_name: str, step: Awaitable[None]):
+    """Runs one step of a profile's sync with its log prefix set, turning sync()'s exits into ordinary errors."""
+    _current_profile.set(profile_name)
+    try:
+        await step
+    except SystemExit as e:
+        # sync() calls sys.exit on fatal errors; that must only stop this profile, not the whole event loop
+        if e.code not in (None, 0):
+            raise RuntimeError(f"sync exited with status {e.code}") from None
+
+async def _fetch_and_release(garmin_client: "GarminClient", start_date: date, end_date: date, output_type: str,
+                             profile_data: dict, profile_name: str):
+    """Runs _fetch_and_write, then releases the client whether or not it succeeded."""
+    try:
+        await _fetch_and_write(garmin_client, start_date, end_date, output_type, profile_data, profile_name)
+    finally:
+        _release_client(garmin_client)
+
+async def _sync_all_profiles(user_profiles: Dict[str, dict], start_date: date, end_date: date, output_type: str) -> List[str]:
+    """Syncs every profile and returns the names of those that failed.
+
+    Logins run one profile at a time because they may prompt for an MFA code, which must not interleave
+    with other profiles' output. The fetches and writes then run concurrently.
+    """
+    from src.garmin_client import GarminClient
+
+    failed = []
+    logged_in = {}
+    for name, data in user_profiles.items():
+        garmin_client = GarminClient(data.get('email'), data.get('password'))
+        try:
+            # A task of its own, so the profile's log prefix doesn't leak into this context
+            await asyncio.ensure_future(_run_as_profile(
+                name, _authenticate_off_loop(garmin_client, data.get('email'), data.get('password'), name)
+            ))
+        except Exception as e:
+            logger.error(f"Sync failed for profile '{name}': {e}")
+            failed.append(name)
+            _release_client(garmin_client)
+        else:
+            logged_in[name] = garmin_client
+
+    results = await asyncio.gather(
+        *(_run_as_profile(name, _fetch_and_release(garmin_client, start_date, end_date, output_type, user_profiles[name], name))
+          for name, garmin_client in logged_in.items()),
+        return_exceptions=True
+    )
+    for name, result in zip(logged_in, results):
+        if isinstance(result, BaseException):
+            logger.error(f"Sync failed for profile '{name}': {result}")
+            failed.append(name)
+    return failed
 
 @app.command(name="sync")
 def cli_sync(
     start_date: str = typer.Option(..., help="Start date in YYYY-MM-DD format."),
     end_date: str = typer.Option(..., help="End date in YYYY-MM-DD format."),
     profile: str = typer.Option("USER1", help="The user profile from .env to use (e.g., USER1)."),
-    output_type: str = typer.Option("sheets", help="Output type: 'sheets' or 'csv'.")
+    output_type: str = typer.Option("sheets", help="Output type: 'sheets' or 'csv'."),
+    all_profiles: bool = typer.Option(False, "--all-profiles", help="Sync every profile in .env concurrently (ignores --profile).")
 ):
     """Run the Garmin sync from the command line."""
     user_profiles = load_user_profiles()
+
+    # Parse the date strings
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError as e:
+        logger.error(f"Invalid date format: {e}. Please use YYYY-MM-DD format.")
+        sys.exit(1)
+
+    if all_profiles:
+        if not user_profiles:
+            logger.error("No user profiles found in .env file.")
+            sys.exit(1)
+
+        failed = []
+        runnable_profiles = {}
+        for name, data in user_profiles.items():
+            if data.get('email') and data.get('password'):
+                runnable_profiles[name] = data
+            else:
+                logger.error(f"Email or password not configured for profile '{name}'.")
+                failed.append(name)
+
+        logger.info(f"Syncing {len(runnable_profiles)} profiles: {list(runnable_profiles)}")
+        failed += asyncio.run(_sync_all_profiles(runnable_profiles, start, end, output_type))
+        if failed:
+            logger.error(f"{len(failed)} of {len(user_profiles)} profiles failed: {failed}")
+            sys.exit(1)
+        return
+
     selected_profile_data = user_profiles.get(profile)
 
     if not selected_profile_data:
@@ -278,14 +512,6 @@ def cli_sync(
         logger.error(f"Email or password not configured for profile '{profile}'.")
         sys.exit(1)
 
-    # Parse the date strings
-    try:
-        start = datetime.strptime(start_date, "%Y-%m-%d").date()
-        end = datetime.strptime(end_date, "%Y-%m-%d").date()
-    except ValueError as e:
-        logger.error(f"Invalid date format: {e}. Please use YYYY-MM-DD format.")
-        sys.exit(1)
-
     asyncio.run(sync(
         email=email,
         password=password,
@@ -383,13 +609,23 @@ async def run_interactive_sync():
         profile_name=selected_profile_name
     )
 
+@functools.lru_cache(maxsize=1)
+def _env_path() -> str:
+    """Locates the .env file once per process."""
+    from dotenv import find_dotenv
+    return find_dotenv(usecwd=True)
+
 def main():
     """Main entry point for the application."""
-    env_file_path = find_dotenv(usecwd=True)
-    if env_file_path:
-        load_dotenv(dotenv_path=env_file_path)
-    else:
-        logger.warning(".env file not found. Please ensure it's in the root directory.")
+    # Child invocations inherit the already-loaded environment, so skip the .env lookup
+    if not os.environ.get(ENV_LOADED_SENTINEL):
+        env_file_path = _env_path()
+        if env_file_path:
+            from dotenv import load_dotenv
+            load_dotenv(dotenv_path=env_file_path)
+            os.environ[ENV_LOADED_SENTINEL] = "1"
+        else:
+            logger.warning(".env file not found. Please ensure it's in the root directory.")
     
     # Check if any CLI arguments were provided
     if len(sys.argv) > 1:
@@ -0,0 +1,85 @@
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List
+
+logger = logging.getLogger(__name__)
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+class RequestStats:
+    """Counts and times the API requests a client makes. Safe to share between executor threads."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.requested = 0
+        self.succeeded = 0
+        self.errored = 0
+        self.retried = 0
+        self.peak_in_flight = 0
+        self._in_flight = 0
+        self._durations: List[float] = []
+        self._waits: List[float] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Times one request attempt and records whether it succeeded."""
+        with self._lock:
+            self.requested += 1
+            self._in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+        start = time.perf_counter()
+        succeeded = False
+        try:
+            yield
+            succeeded = True
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._in_flight -= 1
+                self._durations.append(elapsed)
+                if succeeded:
+                    self.succeeded += 1
+                else:
+                    self.errored += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retried += 1
+
+    def record_wait(self, seconds: float):
+        """Records how long a request queued for a free slot before it was sent."""
+        with self._lock:
+            self._waits.append(seconds)
+
+    def percentile(self, pct: float) -> float:
+        """Returns the nearest-rank percentile of request durations in seconds, or 0.0 if nothing was timed."""
+        with self._lock:
+            return _percentile(sorted(self._durations), pct)
+
+    def wait_percentile(self, pct: float) -> float:
+        """Returns the nearest-rank percentile of slot waits in seconds, or 0.0 if none were recorded."""
+        with self._lock:
+            return _percentile(sorted(self._waits), pct)
+
+    def log_summary(self):
+        """Logs the counters and p50/p95 latency collected so far."""
+        if not self.requested:
+            return
+        logger.info(
+            "%s API: %d requests, %d succeeded, %d errored, %d retried, peak %d in flight, p50 %.0fms, p95 %.0fms",
+            self.name, self.requested, self.succeeded, self.errored, self.retried, self.peak_in_flight,
+            self.percentile(50) * 1000, self.percentile(95) * 1000,
+        )
+        if self._waits:
+            logger.info(
+                "%s API: waited for a free call slot p50 %.0fms, p95 %.0fms",
+                self.name, self.wait_percentile(50) * 1000, self.wait_percentile(95) * 1000,
+            )
@@ -1,36 +1,123 @@
+import functools
 import logging
-from typing import List
+import random
+import socket
+import string
+import time
+from typing import Dict, List, Optional
 from pathlib import Path
-from datetime import date
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+from datetime import date, timedelta
 from googleapiclient.errors import HttpError
 
-from .config import GarminMetrics, HEADERS, HEADER_TO_ATTRIBUTE_MAP
+from .config import GarminMetrics, HEADERS, HEADER_ATTRS, metric_row
+from .request_stats import RequestStats
 
 logger = logging.getLogger(__name__)
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+HTTP_TIMEOUT = 30  # seconds
+# Retry settings for transient Sheets API failures (HTTP 429, 5xx and dropped connections)
+MAX_API_ATTEMPTS = 5
+RETRY_BASE_DELAY = 1.0  # seconds; doubled on each retry, plus jitter
 
 class GoogleAuthTokenRefreshError(Exception):
     """Raised when the Google API token refresh fails."""
     pass
 
+def _is_transient_error(error: Exception, idempotent: bool = True) -> bool:
+    """Returns True for rate limiting, server-side errors and dropped connections that are worth retrying.
+
+    A 5xx or a dropped connection may come after the server applied the request, so for requests that
+    can't safely run twice only rate limiting (rejected before anything was applied) counts.
+    """
+    if isinstance(error, HttpError):
+        return error.resp.status == 429 or (idempotent and error.resp.status >= 500)
+    return idempotent and isinstance(error, (ConnectionError, socket.timeout))
+
+@functools.lru_cache(maxsize=4)
+def _load_credentials(credentials_path: str):
+    """Parses a service account file once per path; clients sharing the file share the credentials."""
+    from google.oauth2 import service_account
+    return service_account.Credentials.from_service_account_file(credentials_path, scopes=SCOPES)
+
+# Day zero of Google Sheets' serial date numbers
+_SHEETS_EPOCH = date(1899, 12, 30)
+
+def _to_date(value) -> Optional[date]:
+    """Normalises a date, an ISO date string or a Sheets serial day number to a date; anything else gives None."""
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str) and len(value) == 10:
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            return _SHEETS_EPOCH + timedelta(days=int(value))
+        except (OverflowError, ValueError):
+            return None
+    return None
+
+def _first_row(a1_range: str) -> int:
+    """Returns the first row number of an A1 range such as "'Raw Data'!A5:AC7"."""
+    first_cell = a1_range.rsplit('!', 1)[-1].split(':')[0]
+    return int(first_cell.lstrip(string.ascii_letters))
+
+# Position of the date column, formatted once per row rather than type-checked on every cell
+_DATE_COLUMN = HEADER_ATTRS.index('date')
+
+def _metric_to_row(metric: GarminMetrics) -> list:
+    """Converts a GarminMetrics object into a sheet row in HEADERS order."""
+    # Rounding keys off the runtime type: Garmin returns floats for some int-annotated fields (e.g. calories)
+    row_data = ["" if value is None else round(value, 2) if isinstance(value, float) else value
+                for value in metric_row(metric)]
+    if isinstance(metric.date, date):
+        row_data[_DATE_COLUMN] = metric.date.isoformat()
+    return row_data
+
 class GoogleSheetsClient:
     def __init__(self, credentials_path: str, spreadsheet_id: str, sheet_name: str):
+        # The discovery and transport modules are heavy, so they're only imported once a client is built
+        import google_auth_httplib2
+        import httplib2
+        from googleapiclient.discovery import build
+
         self.spreadsheet_id = spreadsheet_id
         self.sheet_name = sheet_name
         self.credentials_path = credentials_path
         self.credentials = self._get_credentials()
-        self.service = build('sheets', 'v4', credentials=self.credentials)
+        # One keep-alive connection serves every request this client makes
+        authorized_http = google_auth_httplib2.AuthorizedHttp(
+            self.credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT)
+        )
+        # Use the discovery document bundled with the library rather than fetching or file-caching one
+        self.service = build('sheets', 'v4', http=authorized_http, static_discovery=True, cache_discovery=False)
         self.spreadsheet_title = None
+        # Sheet row of each date in column A, filled in by prepare()
+        self._row_by_date: Optional[Dict[date, int]] = None
+        self.stats = RequestStats("Google Sheets")
+
+    def _execute(self, request, idempotent: bool = True):
+        """Executes a Sheets API request, retrying rate limits and server errors with backoff. Each attempt is timed.
+
+        Pass idempotent=False for requests that must not be applied twice (adding a sheet, appending rows).
+        """
+        for attempt in range(1, MAX_API_ATTEMPTS + 1):
+            try:
+                with self.stats.track():
+                    return request.execute()
+            except Exception as e:
+                if attempt == MAX_API_ATTEMPTS or not _is_transient_error(e, idempotent):
+                    raise
+                self.stats.record_retry()
+                delay = RETRY_BASE_DELAY * 2 ** (attempt - 1) + random.uniform(0, RETRY_BASE_DELAY)
+                logger.warning(f"Transient Google Sheets API error: {e}. Retrying in {delay:.1f}s (attempt {attempt}/{MAX_API_ATTEMPTS})")
+                time.sleep(delay)
 
     def _get_credentials(self):
         """Load credentials from service account JSON file."""
         try:
-            credentials = service_account.Credentials.from_service_account_file(
-                self.credentials_path,
-                scopes=SCOPES
-            )
+            credentials = _load_credentials(self.credentials_path)
             logger.info("Service account credentials loaded successfully")
             return credentials
         except Exception as e:
@@ -40,79 +127,105 @@ class GoogleSheetsClient:
     def _get_spreadsheet_details(self):
         """Fetches spreadsheet metadata to get sheet properties and title."""
         try:
-            sheet_metadata = self.service.spreadsheets().get(spreadsheetId=self.spreadsheet_id).execute()
+            # Only the titles are needed; skipping the rest of the metadata keeps the response small
+            sheet_metadata = self._execute(self.service.spreadsheets().get(
+                spreadsheetId=self.spreadsheet_id, fields='properties.title,sheets.properties.title'
+            ))
             self.spreadsheet_title = sheet_metadata['properties']['title']
             return sheet_metadata.get('sheets', [])
         except HttpError as e:
             logger.error(f"An error occurred fetching spreadsheet details: {e}")
             raise
 
-    def _setup_sheet(self, all_sheets_properties):
+    def _setup_sheet(self, sheet_exists: bool, has_headers: bool):
         """Ensures the sheet exists and has headers."""
-        sheet_exists = any(s['properties']['title'] == self.sheet_name for s in all_sheets_properties)
-        
         if not sheet_exists:
             logger.info(f"Sheet '{self.sheet_name}' not found in '{self.spreadsheet_title}'. Creating it now.")
             body = {'requests': [{'addSheet': {'properties': {'title': self.sheet_name}}}]}
-            self.service.spreadsheets().batchUpdate(spreadsheetId=self.spreadsheet_id, body=body).execute()
-
-        range_to_check = f"'{self.sheet_name}'!A1"
-        result = self.service.spreadsheets().values().get(
-            spreadsheetId=self.spreadsheet_id, range=range_to_check
-        ).execute()
-
-        if 'values' not in result:
+            try:
+                self._execute(
+                    self.service.spreadsheets().batchUpdate(spreadsheetId=self.spreadsheet_id, body=body),
+                    idempotent=False
+                )
+            except HttpError as e:
+                # The sheet exists either way, e.g. a rate-limited retry whose first attempt did go through
+                if e.resp.status != 400 or 'already exists' not in str(e):
+                    raise
+                logger.info(f"Sheet '{self.sheet_name}' already exists in '{self.spreadsheet_title}'.")
+
+        if not has_headers:
             logger.info(f"Sheet '{self.sheet_name}' is empty. Writing headers.")
-            self.service.spreadsheets().values().update(
+            self._execute(self.service.spreadsheets().values().update(
                 spreadsheetId=self.spreadsheet_id,
-                range=range_to_check,
+                range=f"'{self.sheet_name}'!A1",
                 valueInputOption='RAW',
                 body={'values': [HEADERS]}
-            ).execute()
+            ))
+
+    def prepare(self) -> bool:
+        """Reads the sheet layout, creating the sheet and headers if needed. Returns False if column A can't be read."""
+        all_sheets_properties = self._get_spreadsheet_details()
+        sheet_exists = any(s['properties']['title'] == self.sheet_name for s in all_sheets_properties)
+
+        date_column = []
+        if sheet_exists:
+            try:
+                # Column A holds both the header cell and every date, so one read covers both checks.
+                # Reading it as a single column returns a flat list instead of one list per row.
+                # Unformatted values give date-typed cells as serial numbers and text dates as-is,
+                # whatever the sheet's locale or number format.
+                date_column_range = f"'{self.sheet_name}'!A:A"
+                result = self._execute(self.service.spreadsheets().values().get(
+                    spreadsheetId=self.spreadsheet_id, range=date_column_range, majorDimension='COLUMNS',
+                    valueRenderOption='UNFORMATTED_VALUE', dateTimeRenderOption='SERIAL_NUMBER'
+                ))
+                columns = result.get('values', [])
+                date_column = columns[0] if columns else []
+            except HttpError as e:
+                logger.error(f"Could not read existing dates from sheet: {e}")
+                return False
+
+        self._setup_sheet(sheet_exists, has_headers=bool(date_column and date_column[0]))
+        # Parsed once per sync and kept up to date by update_metrics, so later batches don't re-read the sheet
+        row_by_date = {}
+        for i, value in enumerate(date_column[1:], start=2):
+            parsed = _to_date(value)
+            if parsed is not None:
+                row_by_date[parsed] = i
+        self._row_by_date = row_by_date
+        return True
 
     def update_metrics(self, metrics: List[GarminMetrics]):
         """Updates or appends metrics to the Google Sheet."""
-        all_sheets_properties = self._get_spreadsheet_details()
-        self._setup_sheet(all_sheets_properties)
-        
-        try:
-            date_column_range = f"'{self.sheet_name}'!A:A"
-            result = self.service.spreadsheets().values().get(spreadsheetId=self.spreadsheet_id, range=date_column_range).execute()
-            existing_dates_list = result.get('values', [])
-            date_to_row_map = {row[0]: i + 1 for i, row in enumerate(existing_dates_list) if row}
-        except HttpError as e:
-            logger.error(f"Could not read existing dates from sheet: {e}")
+        if self._row_by_date is None and not self.prepare():
             return
+        row_by_date = self._row_by_date
 
         updates = []
         appends = []
+        append_dates = []
 
+        # Existing dates are rewritten in place; new dates are appended after the table
         for metric in metrics:
-            metric_date_str = metric.date.isoformat() if isinstance(metric.date, date) else metric.date
-            
-            row_data = []
-            for header in HEADERS:
-                attribute_name = HEADER_TO_ATTRIBUTE_MAP.get(header)
-                value = getattr(metric, attribute_name, "") if attribute_name else ""
-                
-                if attribute_name == 'date':
-                    value = metric_date_str
-
-                if value is None:
-                    value = ""
-                elif isinstance(value, float):
-                    value = round(value, 2)
-                
-                row_data.append(value)
-
-            if metric_date_str in date_to_row_map:
-                row_number = date_to_row_map[metric_date_str]
+            # parser.py builds metrics with ISO string dates, so both forms are accepted
+            metric_date = _to_date(metric.date)
+            if metric_date is None:
+                logger.warning(f"Skipping metrics with no usable date: {metric.date!r}")
+                continue
+            row_data = _metric_to_row(metric)
+            row_number = row_by_date.get(metric_date)
+            if row_number is not None:
                 updates.append({
                     'range': f"'{self.sheet_name}'!A{row_number}",
                     'values': [row_data]
                 })
             else:
                 appends.append(row_data)
+                append_dates.append(metric_date)
+
+        if not updates and not appends:
+            logger.info("No new data to update or append.")
+            return
 
         if updates:
             logger.info(f"Updating {len(updates)} existing rows in '{self.spreadsheet_title}'.")
@@ -120,17 +233,17 @@ class GoogleSheetsClient:
                 'valueInputOption': 'USER_ENTERED',
                 'data': updates
             }
-            self.service.spreadsheets().values().batchUpdate(spreadsheetId=self.spreadsheet_id, body=body).execute()
-
+            self._execute(self.service.spreadsheets().values().batchUpdate(spreadsheetId=self.spreadsheet_id, body=body))
         if appends:
             logger.info(f"Appending {len(appends)} new rows to '{self.spreadsheet_title}'.")
-            self.service.spreadsheets().values().append(
+            # append finds the real end of the table (rows with a blank date cell included), and
+            # INSERT_ROWS grows the grid, so a sheet whose rows are all used never rejects the write
+            result = self._execute(self.service.spreadsheets().values().append(
                 spreadsheetId=self.spreadsheet_id,
                 range=f"'{self.sheet_name}'!A1",
                 valueInputOption='USER_ENTERED',
                 insertDataOption='INSERT_ROWS',
                 body={'values': appends}
-            ).execute()
-
-        if not updates and not appends:
-            logger.info("No new data to update or append.")
+            ), idempotent=False)
+            first_new_row = _first_row(result['updates']['updatedRange'])
+            row_by_date.update((metric_date, first_new_row + i) for i, metric_date in enumerate(append_dates))
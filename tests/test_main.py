@@ -0,0 +1,157 @@
+import asyncio
+import csv
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock
+
+try:
+    import typer  # noqa: F401
+except ImportError:
+    raise unittest.SkipTest("typer is not installed")
+
+from src import main
+from src.config import HEADERS, GarminMetrics
+
+
+class WriteCsvTests(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(main._close_csv_writers)
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.csv_path = Path(tmp_dir.name) / "output" / "metrics.csv"
+
+    def read_rows(self):
+        with open(self.csv_path, newline='') as f:
+            return list(csv.reader(f))
+
+    def test_header_written_once_and_rows_appended(self):
+        main._write_csv([GarminMetrics(date=date(2024, 1, 1), steps=10)], self.csv_path)
+        main._write_csv([GarminMetrics(date=date(2024, 1, 2), steps=20)], self.csv_path)
+
+        rows = self.read_rows()
+        self.assertEqual(rows[0], HEADERS)
+        self.assertEqual([row[0] for row in rows[1:]], ['2024-01-01', '2024-01-02'])
+        self.assertEqual(rows[1][HEADERS.index('Steps')], '10')
+        self.assertEqual(rows[1][HEADERS.index('Sleep Score')], '')
+
+    def test_reopened_file_is_not_given_a_second_header(self):
+        main._write_csv([GarminMetrics(date=date(2024, 1, 1))], self.csv_path)
+        main._close_csv_writers()
+        main._write_csv([GarminMetrics(date=date(2024, 1, 2))], self.csv_path)
+
+        self.assertEqual([row[0] for row in self.read_rows()], [HEADERS[0], '2024-01-01', '2024-01-02'])
+
+
+class FakeSheetsClient:
+    """Records the batches _stream_to_sheets hands to update_metrics."""
+
+    sheet_name = 'Raw Data'
+
+    def __init__(self, prepare_result=True):
+        self.prepare_result = prepare_result
+        self.prepare_calls = 0
+        self.batches = []
+
+    def prepare(self):
+        self.prepare_calls += 1
+        return self.prepare_result
+
+    def update_metrics(self, metrics):
+        self.batches.append([metric.date for metric in metrics])
+
+
+async def fetch_after(day, delay):
+    await asyncio.sleep(delay)
+    return GarminMetrics(date=day)
+
+
+class StreamToSheetsTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(main, 'SHEETS_WRITE_BATCH_SIZE', 3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.days = [date(2024, 1, 1) + timedelta(days=i) for i in range(8)]
+
+    def test_writes_in_date_order_and_in_batches(self):
+        client = FakeSheetsClient()
+        # Later days finish first, so the coordinator has to hold them back
+        fetches = [fetch_after(day, 0.001 * (len(self.days) - i)) for i, day in enumerate(self.days)]
+
+        asyncio.run(main._stream_to_sheets(client, fetches))
+
+        self.assertEqual(client.prepare_calls, 1)
+        self.assertEqual(client.batches, [self.days[0:3], self.days[3:6], self.days[6:8]])
+
+    def test_days_finishing_in_order_are_written_as_they_arrive(self):
+        client = FakeSheetsClient()
+        fetches = [fetch_after(day, 0.001 * i) for i, day in enumerate(self.days)]
+
+        asyncio.run(main._stream_to_sheets(client, fetches))
+
+        self.assertEqual(client.batches, [self.days[0:3], self.days[3:6], self.days[6:8]])
+
+    def test_failing_fetch_cancels_the_rest(self):
+        client = FakeSheetsClient()
+        cancelled = []
+
+        async def failing():
+            await asyncio.sleep(0.001)
+            raise ValueError("fetch failed")
+
+        async def never_finishes(day):
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.append(day)
+                raise
+
+        async def run():
+            fetches = [failing()] + [never_finishes(day) for day in self.days[1:]]
+            with self.assertRaises(ValueError):
+                await main._stream_to_sheets(client, fetches)
+            # Let the cancellations be delivered before checking them
+            await asyncio.sleep(0)
+
+        asyncio.run(run())
+
+        self.assertEqual(sorted(cancelled), self.days[1:])
+        self.assertEqual(client.batches, [])
+
+    def test_unreadable_sheet_stops_before_writing(self):
+        client = FakeSheetsClient(prepare_result=False)
+        fetches = [fetch_after(day, 0) for day in self.days]
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(main._stream_to_sheets(client, fetches))
+
+        self.assertEqual(client.prepare_calls, 1)
+        self.assertEqual(client.batches, [])
+
+
+class LoadUserProfilesTests(unittest.TestCase):
+    def test_groups_known_keys_by_profile(self):
+        environ = {
+            'USER1_GARMIN_EMAIL': 'one@example.com',
+            'USER1_GARMIN_PASSWORD': 'secret',
+            'USER1_SHEET_NAME': 'Raw Data',
+            'USER12_CSV_PATH': 'out.csv',
+            'USER1_UNKNOWN': 'ignored',
+            'USER_SHEET_ID': 'no number',
+            'USER²_SHEET_ID': 'not a decimal digit',
+            'USERX_SHEET_ID': 'not a number',
+            'PATH': '/usr/bin',
+        }
+        with mock.patch.dict(os.environ, environ, clear=True):
+            profiles = main.load_user_profiles()
+
+        self.assertEqual(profiles, {
+            'USER1': {'email': 'one@example.com', 'password': 'secret', 'sheet_name': 'Raw Data'},
+            'USER12': {'csv_path': 'out.csv'},
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,230 @@
+import json
+import unittest
+from datetime import date
+from unittest import mock
+
+try:
+    import googleapiclient.discovery  # noqa: F401
+except ImportError:
+    raise unittest.SkipTest("google-api-python-client is not installed")
+
+from googleapiclient.errors import HttpError
+
+from src import sheets_client
+from src.config import HEADERS, GarminMetrics
+from src.sheets_client import GoogleSheetsClient, _to_date
+
+
+class _Request:
+    def __init__(self, result, errors=()):
+        self._result = result
+        self._errors = list(errors)
+
+    def execute(self):
+        if self._errors:
+            raise self._errors.pop(0)
+        return self._result
+
+
+def http_error(status, message=''):
+    resp = mock.Mock(status=status, reason=message)
+    return HttpError(resp, json.dumps({'error': {'code': status, 'message': message}}).encode())
+
+
+class FakeSheetsService:
+    """Just enough of the Sheets v4 service for GoogleSheetsClient, recording every write.
+
+    Like the real API, writes to fixed ranges are rejected below the sheet's last grid row,
+    while values.append with INSERT_ROWS adds rows after the table and grows the grid.
+    """
+
+    def __init__(self, sheet_titles, column_a, table_rows=None, grid_rows=1000):
+        self.sheet_titles = sheet_titles
+        self.column_a = column_a
+        # Rows holding data in any column; a row can have data with a blank date cell
+        self.table_rows = len(column_a) if table_rows is None else table_rows
+        self.grid_rows = grid_rows
+        self.writes = []
+        # Errors the next request of each kind raises before it succeeds, e.g. {'append': [http_error(503)]}
+        self.errors = {}
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def _check_in_grid(self, cell_range, row_count):
+        first_row = int(cell_range.rsplit('!', 1)[-1].lstrip('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+        if first_row + row_count - 1 > self.grid_rows:
+            raise ValueError(f"Range ({cell_range}) exceeds grid limits. Max rows: {self.grid_rows}")
+        self.table_rows = max(self.table_rows, first_row + row_count - 1)
+
+    def get(self, **kwargs):
+        if 'range' in kwargs:
+            return _Request({'values': [self.column_a]} if self.column_a else {})
+        sheets = [{'properties': {'title': title}} for title in self.sheet_titles]
+        return _Request({'properties': {'title': 'Spreadsheet'}, 'sheets': sheets})
+
+    def update(self, **kwargs):
+        self._check_in_grid(kwargs['range'], len(kwargs['body']['values']))
+        self.writes.append(('update', kwargs['range'], kwargs['body']['values']))
+        return _Request({})
+
+    def append(self, **kwargs):
+        assert kwargs['insertDataOption'] == 'INSERT_ROWS'
+        rows = kwargs['body']['values']
+        first_row = self.table_rows + 1
+        self.table_rows += len(rows)
+        self.grid_rows = max(self.grid_rows, self.table_rows)
+        cell_range = f"'Raw Data'!A{first_row}:T{self.table_rows}"
+        self.writes.append(('append', cell_range, rows))
+        return _Request({'updates': {'updatedRange': cell_range}}, self.errors.pop('append', ()))
+
+    def batchUpdate(self, **kwargs):
+        body = kwargs['body']
+        if 'data' in body:
+            for entry in body['data']:
+                self._check_in_grid(entry['range'], len(entry['values']))
+                self.writes.append(('values', entry['range'], entry['values']))
+            return _Request({}, self.errors.pop('values', ()))
+        self.writes.append(('sheet', None, body['requests']))
+        return _Request({}, self.errors.pop('sheet', ()))
+
+
+def make_client(service):
+    with mock.patch.object(sheets_client, '_load_credentials', return_value=mock.Mock()), \
+            mock.patch('googleapiclient.discovery.build', return_value=service):
+        return GoogleSheetsClient('credentials.json', 'spreadsheet-id', 'Raw Data')
+
+
+def written_dates(writes):
+    return [(kind, cell_range, [row[0] for row in rows]) for kind, cell_range, rows in writes if kind != 'sheet']
+
+
+class ToDateTests(unittest.TestCase):
+    def test_serial_number(self):
+        self.assertEqual(_to_date(45292), date(2024, 1, 1))
+
+    def test_fractional_serial_number_drops_the_time(self):
+        self.assertEqual(_to_date(45292.75), date(2024, 1, 1))
+
+    def test_iso_text(self):
+        self.assertEqual(_to_date('2024-01-02'), date(2024, 1, 2))
+
+    def test_date_passes_through(self):
+        self.assertEqual(_to_date(date(2024, 1, 3)), date(2024, 1, 3))
+
+    def test_header_and_other_text(self):
+        self.assertIsNone(_to_date(HEADERS[0]))
+        self.assertIsNone(_to_date('2024-13-45'))
+        self.assertIsNone(_to_date(''))
+
+    def test_bool_is_not_a_serial_number(self):
+        self.assertIsNone(_to_date(True))
+        self.assertIsNone(_to_date(False))
+
+
+class UpdateMetricsTests(unittest.TestCase):
+    def test_updates_existing_rows_and_appends_after_the_table(self):
+        service = FakeSheetsService(['Raw Data'], [HEADERS[0], 45292, '2024-01-02'])
+        client = make_client(service)
+
+        client.update_metrics([GarminMetrics(date=date(2024, 1, 2), steps=1), GarminMetrics(date=date(2024, 1, 3), steps=2)])
+        client.update_metrics([GarminMetrics(date=date(2024, 1, 1)), GarminMetrics(date=date(2024, 1, 3)),
+                               GarminMetrics(date=date(2024, 1, 4))])
+
+        self.assertEqual(written_dates(service.writes), [
+            ('values', "'Raw Data'!A3", ['2024-01-02']),
+            ('append', "'Raw Data'!A4:T4", ['2024-01-03']),
+            ('values', "'Raw Data'!A2", ['2024-01-01']),
+            ('values', "'Raw Data'!A4", ['2024-01-03']),
+            ('append', "'Raw Data'!A5:T5", ['2024-01-04']),
+        ])
+
+    def test_full_grid_still_takes_new_rows(self):
+        service = FakeSheetsService(['Raw Data'], [HEADERS[0], '2024-01-01', '2024-01-02'], grid_rows=3)
+        client = make_client(service)
+
+        client.update_metrics([GarminMetrics(date=date(2024, 1, 2)), GarminMetrics(date=date(2024, 1, 3))])
+        client.update_metrics([GarminMetrics(date=date(2024, 1, 3)), GarminMetrics(date=date(2024, 1, 4))])
+
+        self.assertEqual(written_dates(service.writes), [
+            ('values', "'Raw Data'!A3", ['2024-01-02']),
+            ('append', "'Raw Data'!A4:T4", ['2024-01-03']),
+            ('values', "'Raw Data'!A4", ['2024-01-03']),
+            ('append', "'Raw Data'!A5:T5", ['2024-01-04']),
+        ])
+
+    def test_rows_with_a_blank_date_cell_are_not_overwritten(self):
+        # Row 3 has data in other columns but nothing in column A
+        service = FakeSheetsService(['Raw Data'], [HEADERS[0], '2024-01-01'], table_rows=3)
+        client = make_client(service)
+
+        client.update_metrics([GarminMetrics(date=date(2024, 1, 2))])
+
+        self.assertEqual(written_dates(service.writes), [('append', "'Raw Data'!A4:T4", ['2024-01-02'])])
+
+    def test_string_dates_match_and_missing_dates_are_skipped(self):
+        service = FakeSheetsService(['Raw Data'], [HEADERS[0], '2024-01-01'])
+        client = make_client(service)
+
+        client.update_metrics([GarminMetrics(date='2024-01-01'), GarminMetrics(date=None)])
+
+        self.assertEqual(written_dates(service.writes), [('values', "'Raw Data'!A2", ['2024-01-01'])])
+
+    def test_new_sheet_gets_headers_and_rows_from_row_two(self):
+        service = FakeSheetsService([], [])
+        client = make_client(service)
+
+        client.update_metrics([GarminMetrics(date=date(2024, 1, 1))])
+        client.update_metrics([GarminMetrics(date=date(2024, 1, 2))])
+
+        self.assertEqual(service.writes[0][0], 'sheet')
+        self.assertEqual(written_dates(service.writes), [
+            ('update', "'Raw Data'!A1", [HEADERS[0]]),
+            ('append', "'Raw Data'!A2:T2", ['2024-01-01']),
+            ('append', "'Raw Data'!A3:T3", ['2024-01-02']),
+        ])
+
+
+@mock.patch.object(sheets_client.time, 'sleep')
+class RetryTests(unittest.TestCase):
+    def test_row_updates_are_retried_on_server_errors(self, sleep):
+        service = FakeSheetsService(['Raw Data'], [HEADERS[0], '2024-01-01'])
+        service.errors['values'] = [http_error(503), http_error(500)]
+        client = make_client(service)
+
+        client.update_metrics([GarminMetrics(date=date(2024, 1, 1))])
+
+        self.assertEqual(client.stats.retried, 2)
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_appends_are_only_retried_when_rate_limited(self, sleep):
+        service = FakeSheetsService(['Raw Data'], [HEADERS[0]])
+        service.errors['append'] = [http_error(429)]
+        client = make_client(service)
+        client.update_metrics([GarminMetrics(date=date(2024, 1, 1))])
+        self.assertEqual(client.stats.retried, 1)
+
+        # A 503 may arrive after the rows were written, so retrying could duplicate them
+        service.errors['append'] = [http_error(503)]
+        with self.assertRaises(HttpError):
+            client.update_metrics([GarminMetrics(date=date(2024, 1, 2))])
+        self.assertEqual(client.stats.retried, 1)
+
+    def test_add_sheet_that_already_exists_after_a_retry_succeeds(self, sleep):
+        service = FakeSheetsService([], [])
+        service.errors['sheet'] = [http_error(429), http_error(400, "A sheet with the name 'Raw Data' already exists.")]
+        client = make_client(service)
+
+        client.update_metrics([GarminMetrics(date=date(2024, 1, 1))])
+
+        self.assertEqual(written_dates(service.writes), [
+            ('update', "'Raw Data'!A1", [HEADERS[0]]),
+            ('append', "'Raw Data'!A2:T2", ['2024-01-01']),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()